@@ -0,0 +1,30 @@
+"""
+Repairs for falsely migrated Foundry VTT Pathfinder 1e compendium packs (NeDB .db files).
+
+Command line: python -m pf1repair {traits,resistances,identifiers,all,verify,validate,assets,index} ...
+
+In-process use, without writing files:
+
+    from pf1repair import repair_docs
+
+    for doc, changes in repair_docs(docs):
+        ...
+"""
+from __future__ import annotations
+
+import importlib
+from typing import Any
+
+__all__ = ["REPAIRS", "chain_repairs", "get_repair", "repair_docs"]
+
+
+def __getattr__(name: str) -> Any:
+    # the pipeline (and the repair modules behind it) is imported on first use,
+    # so `import pf1repair` and the CLI start-up stay cheap
+    if name in __all__:
+        return getattr(importlib.import_module(".pipeline", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,275 @@
+"""
+Asset reference index: img fields and inline <img src="modules/..."> per pack and document,
+broken references and unused asset files.
+"""
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+from urllib.parse import unquote
+
+from .common import iter_db_docs
+
+
+# File types Foundry loads as images/media from a module folder
+ASSET_EXTS = {".webp", ".gif", ".png", ".jpg", ".jpeg", ".svg", ".webm", ".mp4"}
+
+# Keys whose whole string value is a path (doc.img, token.img, tiles[].img, scene background src, ...)
+PATH_KEYS = {"img", "src", "icon", "texture"}
+
+# Inline references inside HTML descriptions: <img src="modules/pf-content/assets/...">.
+# The quoted attribute value is the whole path, raw spaces included.
+ATTR_REF_RE = re.compile(r"""\b(?:src|href|data-src)\s*=\s*(["'])(.*?)\1""", re.IGNORECASE | re.DOTALL)
+# Fallback for references outside a quoted attribute (CSS url(...), plain text); ends at whitespace
+MODULE_REF_RE = re.compile(r"""modules/([A-Za-z0-9_.-]+)/([^"'<>\s)]+)""")
+
+
+def _add_path_ref(value: str, refs: Set[Tuple[str, str]]) -> bool:
+    """Add "modules/<id>/<path>" (optionally with a leading "/") to refs. Returns False if value is no such path."""
+    s = value.strip().lstrip("/")
+    if not s.startswith("modules/"):
+        return False
+    parts = s.split("/", 2)
+    if len(parts) == 3 and parts[2]:
+        refs.add((parts[1], unquote(parts[2].split("?", 1)[0])))
+    return True
+
+
+def collect_refs(obj: Any, refs: Set[Tuple[str, str]], key: str | None = None) -> None:
+    """
+    Walk any dict/list and collect (module_id, relative_path) for every
+    "modules/<id>/<path>" reference. Paths are URL-decoded ("%20" -> " ").
+    """
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            collect_refs(v, refs, k)
+    elif isinstance(obj, list):
+        for v in obj:
+            collect_refs(v, refs, key)
+    elif isinstance(obj, str):
+        if "modules/" not in obj:
+            return
+        # whole value is the path; may contain raw spaces
+        if key in PATH_KEYS and _add_path_ref(obj, refs):
+            return
+
+        def attr(m: re.Match) -> str:
+            return "" if _add_path_ref(html.unescape(m.group(2)), refs) else m.group(0)
+
+        rest = ATTR_REF_RE.sub(attr, obj)
+        for m in MODULE_REF_RE.finditer(rest):
+            refs.add((m.group(1), unquote(m.group(2).split("?", 1)[0])))
+
+
+def load_modules(root: Path) -> Dict[str, Path]:
+    """Map module id -> module folder for every module.json directly under root."""
+    modules: Dict[str, Path] = {}
+    for manifest in sorted(root.glob("*/module.json")):
+        mod_dir = manifest.parent
+        mod_id = mod_dir.name
+        try:
+            data = json.loads(manifest.read_text(encoding="utf-8"))
+            if isinstance(data, dict) and isinstance(data.get("id"), str) and data["id"]:
+                mod_id = data["id"]
+        except (OSError, json.JSONDecodeError):
+            pass
+        modules[mod_id] = mod_dir
+    return modules
+
+
+def manifest_refs(mod_dir: Path) -> Set[str]:
+    """Relative paths the module.json itself points at (e.g. media cover art)."""
+    refs: Set[str] = set()
+    try:
+        data = json.loads((mod_dir / "module.json").read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return refs
+
+    media = data.get("media") if isinstance(data, dict) else None
+    if isinstance(media, list):
+        for m in media:
+            url = m.get("url") if isinstance(m, dict) else None
+            if isinstance(url, str) and url and "://" not in url:
+                refs.add(unquote(url).removeprefix("./"))
+    return refs
+
+
+def list_asset_files(mod_dir: Path) -> Set[str]:
+    """All media files of a module (relative, posix-style), ignoring the packs folder."""
+    files: Set[str] = set()
+    for p in mod_dir.rglob("*"):
+        if not p.is_file() or p.suffix.lower() not in ASSET_EXTS:
+            continue
+        rel = p.relative_to(mod_dir).as_posix()
+        if rel.startswith("packs/"):
+            continue
+        files.add(rel)
+    return files
+
+
+def resolve_packs(mod_dir: Path) -> Tuple[List[Path], List[str]]:
+    """
+    The .db files of the packs a module declares in module.json (packs[].path), plus any
+    other packs/*.db. Returns (db_files, problems); problems lists every declared pack that
+    cannot be read: missing on disk, a LevelDB folder, or a module.json without a packs list.
+    """
+    try:
+        data = json.loads((mod_dir / "module.json").read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        return sorted((mod_dir / "packs").glob("*.db")), [f"module.json not readable ({e}), declared packs unknown"]
+
+    declared = data.get("packs") if isinstance(data, dict) else None
+    if not isinstance(declared, list):
+        declared = []
+
+    dbs: Set[Path] = set()
+    problems: List[str] = []
+    for pack in declared:
+        path = pack.get("path") if isinstance(pack, dict) else None
+        name = pack.get("name") if isinstance(pack, dict) else None
+        if not isinstance(path, str) or not path.strip():
+            problems.append(f"pack {name!r}: no path in module.json")
+            continue
+        rel = path.strip().removeprefix("./").lstrip("/")
+        target = mod_dir / rel
+        if target.suffix != ".db" and (mod_dir / (rel + ".db")).is_file():
+            # v11 manifests drop the .db; the NeDB file of the pack still lies next to it
+            target = mod_dir / (rel + ".db")
+        if target.is_file():
+            dbs.add(target)
+        elif target.is_dir():
+            problems.append(f"pack {name!r}: {rel} is a LevelDB folder (only NeDB .db files can be read)")
+        else:
+            problems.append(f"pack {name!r}: {rel} not found")
+
+    # undeclared .db files are scanned as well; their references still count as used
+    dbs.update((mod_dir / "packs").glob("*.db"))
+    return sorted(dbs), problems
+
+
+def build_index(
+    modules: Dict[str, Path], unread: Dict[str, List[str]] | None = None
+) -> Dict[str, Dict[str, Dict[str, List[Tuple[str, str]]]]]:
+    """
+    Index every asset reference: {module_id: {pack_name: {doc_key: [(ref_module, ref_path), ...]}}}.
+    doc_key is the _id (or "line <n>" if the document has none).
+    Declared packs that could not be read are added to unread as {module_id: [problem, ...]}.
+    """
+    index: Dict[str, Dict[str, Dict[str, List[Tuple[str, str]]]]] = {}
+    for mod_id, mod_dir in modules.items():
+        db_files, problems = resolve_packs(mod_dir)
+        if problems and unread is not None:
+            unread[mod_id] = problems
+        packs: Dict[str, Dict[str, List[Tuple[str, str]]]] = {}
+        for db in db_files:
+            docs: Dict[str, List[Tuple[str, str]]] = {}
+            for line_no, doc in iter_db_docs(db):
+                refs: Set[Tuple[str, str]] = set()
+                collect_refs(doc, refs)
+                if refs:
+                    _id = doc.get("_id")
+                    doc_key = _id if isinstance(_id, str) and _id else f"line {line_no}"
+                    docs[doc_key] = sorted(refs)
+            packs[db.name] = docs
+        index[mod_id] = packs
+    return index
+
+
+def run(args: argparse.Namespace) -> int:
+    root: Path = args.modules
+    if not root.exists() or not root.is_dir():
+        print(f"ERROR: modules folder not found: {root}")
+        return 2
+
+    modules = load_modules(root)
+    if not modules:
+        print(f"No module.json found below {root}")
+        return 0
+
+    unread: Dict[str, List[str]] = {}
+    index = build_index(modules, unread)
+
+    # Who references which (module, path)?
+    used: Dict[Tuple[str, str], List[str]] = {}
+    for mod_id, packs in index.items():
+        for pack, docs in packs.items():
+            for doc_key, refs in docs.items():
+                for ref in refs:
+                    used.setdefault(ref, []).append(f"{mod_id}/{pack} {doc_key}")
+    for mod_id, mod_dir in modules.items():
+        for rel in manifest_refs(mod_dir):
+            used.setdefault((mod_id, rel), []).append(f"{mod_id}/module.json")
+
+    report_lines: List[str] = []
+
+    # A pack that was not read may hold the only reference to an asset: its module's
+    # "unused" list is incomplete and must not be pruned.
+    for mod_id, problems in unread.items():
+        for problem in problems:
+            report_lines.append(f"UNREAD modules/{mod_id} {problem}")
+
+    # Broken: points into a module we have, but the file does not exist.
+    # References into modules outside root (e.g. pf1 system icons) cannot be checked.
+    broken = [(ref, where) for ref, where in sorted(used.items()) if ref[0] in modules and not (modules[ref[0]] / ref[1]).is_file()]
+    for (mod_id, rel), where in broken:
+        report_lines.append(f"BROKEN modules/{mod_id}/{rel} <- " + "; ".join(where))
+
+    unused: List[Tuple[str, Path]] = []
+    for mod_id, mod_dir in modules.items():
+        for rel in sorted(list_asset_files(mod_dir)):
+            if (mod_id, rel) not in used:
+                unused.append((mod_id, mod_dir / rel))
+                report_lines.append(f"UNUSED modules/{mod_id}/{rel}")
+
+    pruned = 0
+    pruned_bytes = 0
+    kept: List[Path] = []
+    if args.prune:
+        for mod_id, p in unused:
+            if mod_id in unread:
+                continue
+            rel = p.relative_to(modules[mod_id]).as_posix()
+            if any((mod_id, rel[:i]) in used for i, c in enumerate(rel) if c == " "):
+                # a reference cut off at this space may well mean this file
+                kept.append(p)
+                report_lines.append(f"KEPT {p} (a reference ends where its name has a space)")
+                continue
+            pruned += 1
+            pruned_bytes += p.stat().st_size
+            p.unlink()
+            report_lines.append(f"PRUNED {p}")
+
+    total_docs = sum(len(docs) for packs in index.values() for docs in packs.values())
+    print(f"Modules: {len(modules)}")
+    print(f"Documents with asset references: {total_docs}")
+    print(f"Distinct references: {len(used)}")
+    print(f"Broken references: {len(broken)}")
+    print(f"Unused asset files: {len(unused)}")
+    for mod_id, problems in unread.items():
+        print(f"WARNING: {mod_id}: {len(problems)} declared pack(s) not read, unused files of this module are unreliable")
+        for problem in problems:
+            print(f"  {problem}")
+    if args.prune:
+        print(f"Pruned: {pruned} file(s), {pruned_bytes} bytes")
+        if unread:
+            print(f"Not pruned (packs not read): {', '.join(unread)}")
+        if kept:
+            print(f"Not pruned (possibly truncated reference): {len(kept)} file(s)")
+
+    if args.report is not None:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text("\n".join(report_lines), encoding="utf-8")
+        print(f"Report: {args.report}")
+
+    if args.index is not None:
+        args.index.parent.mkdir(parents=True, exist_ok=True)
+        with args.index.open("w", encoding="utf-8", newline="\n") as w:
+            json.dump(index, w, ensure_ascii=False, indent=1)
+        print(f"Index: {args.index}")
+
+    return 0
+
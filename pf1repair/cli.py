@@ -0,0 +1,185 @@
+"""
+pf1repair command line. Only argparse is imported up front; the module that
+implements a subcommand is imported after the arguments are parsed.
+
+    python -m pf1repair all --only-npc --recursive --backup --reports
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+from pathlib import Path
+from typing import List, Sequence
+
+
+def _add_io_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--packages", type=Path, default=Path("packages"), help='Input folder (default: "packages")')
+    ap.add_argument(
+        "--packages-processed",
+        type=Path,
+        default=Path("packages_processed"),
+        help='Output folder (default: "packages_processed")',
+    )
+
+
+def _positive_int(s: str) -> int:
+    n = int(s)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1: {s}")
+    return n
+
+
+def _add_pipeline_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Read, repair and write in overlapping stages (for slow or network-mounted folders)",
+    )
+    ap.add_argument("--queue-depth", type=_positive_int, default=8, help="--pipeline: batches buffered between two stages (default: 8)")
+    ap.add_argument(
+        "--read-block", type=_positive_int, default=1 << 20, help="--pipeline: characters read per batch (default: 1048576)"
+    )
+
+
+def _add_batch_args(ap: argparse.ArgumentParser) -> None:
+    _add_io_args(ap)
+    ap.add_argument("--recursive", action="store_true", help="Search for .db files recursively under packages/")
+    ap.add_argument("--backup", action="store_true", help="Create a .bak copy alongside each processed output file")
+    ap.add_argument("--reports", action="store_true", help="Write per-file reports into packages_processed/_reports/")
+    ap.add_argument(
+        "--index",
+        action="store_true",
+        help="Write a compendium index sidecar (<file>.db.index.json) next to each processed output file",
+    )
+    _add_pipeline_args(ap)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="pf1repair", description="Repair and check Foundry PF1 NeDB .db compendium packs.")
+    sub = ap.add_subparsers(dest="command", required=True, metavar="command")
+
+    p = sub.add_parser(
+        "traits",
+        help="system.traits.*.custom strings -> arrays (n.forEach crash), '+N' strings -> ints",
+        description=(
+            "Batch-repair Foundry PF1 NeDB .db files by converting system.traits.*.custom strings into arrays "
+            "(fixes n.forEach crash) and normalizing '+N' numeric strings."
+        ),
+    )
+    _add_batch_args(p)
+    p.add_argument("--only-npc", action="store_true", help="Only patch documents with type=='npc' (recommended)")
+    p.set_defaults(module="traits")
+
+    p = sub.add_parser(
+        "resistances",
+        help="eres/dr/dv arrays for character-sheet resistance parsing (selected packs)",
+        description="Repair PF1 character-sheet resistance parsing issues in selected packs (*.db) from packages/ -> packages_processed/.",
+    )
+    _add_batch_args(p)
+    p.set_defaults(module="resistances")
+
+    p = sub.add_parser(
+        "identifiers",
+        help="duplicate item identifiers in pf-eidolon-forms.db",
+        description=(
+            "Fix duplicate PF1 item identifiers in pf-eidolon-forms.db by making tags unique "
+            "and removing colliding actor.system.resources keys."
+        ),
+    )
+    _add_io_args(p)
+    p.add_argument("--backup", action="store_true", help="Create .bak next to the processed output file")
+    p.add_argument("--report", action="store_true", help="Write a report to packages_processed/_reports/")
+    p.add_argument(
+        "--index", action="store_true", help="Write a compendium index sidecar (<file>.db.index.json) next to the output file"
+    )
+    _add_pipeline_args(p)
+    p.set_defaults(module="identifiers")
+
+    p = sub.add_parser(
+        "all",
+        help="traits, resistances and identifiers in one pass per pack",
+        description=(
+            "Run every repair that applies to a pack (traits everywhere, resistances and identifiers on their "
+            "target packs) in a single read/write pass. The repairs are chained on each document "
+            "(traits -> resistances -> identifiers); the separate scripts each start from the original packs."
+        ),
+    )
+    _add_batch_args(p)
+    p.add_argument("--only-npc", action="store_true", help="Only apply the trait repair to type=='npc' (recommended)")
+    p.set_defaults(module="pipeline")
+
+    p = sub.add_parser(
+        "verify",
+        help="compare a run against a reference tree, check idempotence",
+        description=(
+            "Verify repaired .db files against a reference tree by canonical per-document hashes "
+            "(matched by _id), and check that the repairs are a no-op on their own output."
+        ),
+    )
+    p.add_argument("reference", type=Path, help="Reference folder (e.g. packages_processed/content_finished)")
+    p.add_argument("new", type=Path, nargs="?", default=None, help="Folder of the new run (omit to only check idempotence)")
+    p.add_argument("--recursive", action="store_true", help="Search for .db files recursively")
+    p.add_argument("--idempotence", action="store_true", help="Also re-run the repairs on the new (or reference) files")
+    p.add_argument(
+        "--only-npc",
+        action="store_true",
+        help="--idempotence: only re-check the trait repair on type=='npc', as in a run with --only-npc",
+    )
+    p.add_argument("--workers", type=_positive_int, default=None, help="Worker processes (default: CPU count)")
+    p.add_argument("--report", type=Path, default=None, help="Write the full report to this file")
+    p.set_defaults(module="verify")
+
+    p = sub.add_parser(
+        "validate",
+        help="report documents whose shape breaks the PF1 actor/item schema",
+        description=(
+            "Check every actor and item document against the expected PF1 data types (system.traits.*, "
+            "resources, item tags, numeric fields) and report each document and path that breaks them."
+        ),
+    )
+    p.add_argument("folder", type=Path, help="Folder with .db files (e.g. modules_fixed_as_full)")
+    p.add_argument("--recursive", action="store_true", help="Search for .db files recursively")
+    p.add_argument("--workers", type=_positive_int, default=None, help="Worker processes (default: CPU count)")
+    p.add_argument("--report", type=Path, default=None, help="Write the full report to this file")
+    p.set_defaults(module="validate")
+
+    p = sub.add_parser(
+        "assets",
+        help="broken asset references and unused asset files in module folders",
+        description=(
+            "Index all asset references (img fields and inline <img src=...>) in Foundry module packs, "
+            "report broken references and unused asset files, optionally prune the unused ones."
+        ),
+    )
+    p.add_argument(
+        "--modules",
+        type=Path,
+        default=Path("modules_fixed_as_full"),
+        help='Folder containing module folders (default: "modules_fixed_as_full")',
+    )
+    p.add_argument("--report", type=Path, default=None, help="Write a text report to this file")
+    p.add_argument("--index", type=Path, default=None, help="Write the full reference index as JSON to this file")
+    p.add_argument("--prune", action="store_true", help="Delete asset files that no document references")
+    p.set_defaults(module="assets")
+
+    p = sub.add_parser(
+        "index",
+        help="build compendium index sidecars for existing .db files",
+        description="Build compendium index sidecars (<pack>.db.index.json: _id, name, type, img, sort, byte offsets) for existing .db files.",
+    )
+    p.add_argument("folder", type=Path, help="Folder with .db files (e.g. modules_fixed_as_full)")
+    p.add_argument("--recursive", action="store_true", help="Search for .db files recursively")
+    p.set_defaults(module="pack_index")
+
+    return ap
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    mod = importlib.import_module(f".{args.module}", __package__)
+    return mod.run(args)
+
+
+def script_main(command: str, argv: List[str]) -> int:
+    """Entry point of the old standalone scripts (repair_pf1_packages.py etc.)."""
+    return main([command, *argv])
@@ -0,0 +1,441 @@
+from __future__ import annotations
+
+import argparse
+import json
+import queue
+import re
+import shutil
+import sys
+import threading
+from contextlib import nullcontext
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, TextIO, Tuple
+
+from .pack_index import IndexedWriter
+
+
+# (changed, changes) for one document; the function decides itself whether the doc is a target
+RepairFn = Callable[[Dict[str, Any]], Tuple[bool, List[str]]]
+# Report line for one patched document: (line_no, doc, changes) -> str
+DescribeFn = Callable[[int, Dict[str, Any], List[str]], str]
+
+# split on semicolon or comma; keep it conservative
+SPLIT_RE = re.compile(r"[;,]+")
+
+# process_pack with pipeline=True: the reader prefetches blocks of READ_BLOCK characters, and at
+# most QUEUE_DEPTH batches wait between two stages, so memory stays bounded for any pack size.
+READ_BLOCK = 1 << 20
+QUEUE_DEPTH = 8
+
+# Entries per trait memo (process-wide, shared by all docs and packs of a run).
+# Bestiary packs repeat the same few hundred trait strings/lists thousands of times.
+TRAIT_CACHE_SIZE = 4096
+
+
+def get(d: Dict[str, Any], path: str, default=None):
+    cur: Any = d
+    for part in path.split("."):
+        if not isinstance(cur, dict) or part not in cur:
+            return default
+        cur = cur[part]
+    return cur
+
+
+def ensure_dict_path(d: Dict[str, Any], path: str) -> Dict[str, Any]:
+    cur: Any = d
+    for part in path.split("."):
+        if part not in cur or not isinstance(cur[part], dict):
+            cur[part] = {}
+        cur = cur[part]
+    return cur  # type: ignore[return-value]
+
+
+@lru_cache(maxsize=TRAIT_CACHE_SIZE)
+def _split_tokens(s: str) -> Tuple[str, ...]:
+    # tuples so a cached result can't be changed through a document; tokens interned
+    return tuple(sys.intern(t) for t in (t.strip() for t in SPLIT_RE.split(s)) if t)
+
+
+@lru_cache(maxsize=TRAIT_CACHE_SIZE)
+def _clean_tokens(items: Tuple[Any, ...]) -> Tuple[str, ...]:
+    return tuple(sys.intern(x) for x in items if isinstance(x, str) and x.strip())
+
+
+def str_to_list(s: str) -> List[str]:
+    """
+    Convert "A;B;" or "A, B" into ["A","B"].
+    Removes empty tokens and trims whitespace.
+    """
+    if not isinstance(s, str):
+        return []
+    return list(_split_tokens(s))
+
+
+def clean_str_list(val: List[Any]) -> List[str] | None:
+    """
+    Drop non-strings and blank strings from a trait list.
+    Returns the cleaned list, or None if val is already clean.
+    """
+    try:
+        cleaned = _clean_tokens(tuple(val))
+    except TypeError:
+        # unhashable items (dicts/lists) can't be memoized
+        cleaned = tuple(x for x in val if isinstance(x, str) and x.strip())
+    # only ever removes items, so same length == unchanged
+    if len(cleaned) == len(val):
+        return None
+    return list(cleaned)
+
+
+def trait_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counters of the trait memos since start (or clear_trait_caches)."""
+    stats = {}
+    for name, fn in (("str_to_list", _split_tokens), ("clean_list", _clean_tokens)):
+        info = fn.cache_info()
+        stats[name] = {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize or 0}
+    return stats
+
+
+def format_trait_cache_stats() -> str:
+    return "Trait cache: " + ", ".join(
+        f"{name} hits={s['hits']} misses={s['misses']} size={s['size']}/{s['maxsize']}"
+        for name, s in trait_cache_stats().items()
+    )
+
+
+def clear_trait_caches() -> None:
+    _split_tokens.cache_clear()
+    _clean_tokens.cache_clear()
+
+
+def convert_plus_number_strings(obj: Any, changes: List[str] | None = None) -> bool:
+    """
+    Walk any dict/list and convert strings like '+2' or '+10' to int.
+    Returns True if anything changed.
+    """
+    changed = False
+
+    if isinstance(obj, dict):
+        for k, v in list(obj.items()):
+            if isinstance(v, str):
+                s = v.strip()
+                if s.startswith("+") and s[1:].isdigit():
+                    obj[k] = int(s[1:])
+                    changed = True
+                    if changes is not None:
+                        changes.append(f'plus-number: {k} "{v}" -> {obj[k]}')
+            else:
+                if convert_plus_number_strings(v, changes):
+                    changed = True
+
+    elif isinstance(obj, list):
+        for i, v in enumerate(list(obj)):
+            if isinstance(v, str):
+                s = v.strip()
+                if s.startswith("+") and s[1:].isdigit():
+                    obj[i] = int(s[1:])
+                    changed = True
+                    if changes is not None:
+                        changes.append(f'plus-number: [{i}] "{v}" -> {obj[i]}')
+            else:
+                if convert_plus_number_strings(v, changes):
+                    changed = True
+
+    return changed
+
+
+def describe_doc(line_no: int, doc: Dict[str, Any], changes: List[str]) -> str:
+    return f"Line {line_no}: type={doc.get('type')!r}, name={doc.get('name')!r}, _id={doc.get('_id')!r} -> " + "; ".join(changes)
+
+
+def iter_db_docs(path: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Stream one .db (NeDB JSON-lines) file and yield (line_no, doc).
+    Blank lines, broken JSON and non-dict lines are skipped, same as process_pack.
+    """
+    with path.open("r", encoding="utf-8", errors="replace") as r:
+        for line_no, line in enumerate(r, start=1):
+            raw = line.rstrip("\n")
+            if not raw.strip():
+                continue
+
+            try:
+                doc = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+
+            if not isinstance(doc, dict):
+                continue
+
+            yield line_no, doc
+
+
+def find_db_files(in_dir: Path, recursive: bool) -> List[Path]:
+    pattern = "**/*.db" if recursive else "*.db"
+    return sorted(in_dir.glob(pattern))
+
+
+_DONE = object()
+
+
+class _Stage(threading.Thread):
+    """Runs fn(*args) in a daemon thread and keeps the exception for the caller."""
+
+    def __init__(self, fn: Callable[..., None], *args: Any) -> None:
+        super().__init__(daemon=True)
+        self.fn = fn
+        self.args = args
+        self.error: BaseException | None = None
+
+    def run(self) -> None:
+        try:
+            self.fn(*self.args)
+        except BaseException as e:
+            self.error = e
+
+
+def _put(q: "queue.Queue[Any]", item: Any, stop: threading.Event) -> bool:
+    """Blocking put that gives up once another stage failed. Returns False if stopped."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: "queue.Queue[Any]", stop: threading.Event) -> Any:
+    """Blocking get that returns _DONE once another stage failed."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def _read_batches(r: TextIO, out_q: "queue.Queue[Any]", stop: threading.Event, read_block: int) -> None:
+    # Lines keep their "\n" like `for line in r` would, the last one may have none
+    try:
+        # pieces of a line longer than read_block, joined once its "\n" arrives
+        pending: List[str] = []
+        while not stop.is_set():
+            block = r.read(read_block)
+            if not block:
+                break
+            if "\n" not in block:
+                pending.append(block)
+                continue
+            lines = block.split("\n")
+            if pending:
+                pending.append(lines[0])
+                lines[0] = "".join(pending)
+            tail = lines.pop()
+            pending = [tail] if tail else []
+            if not _put(out_q, [line + "\n" for line in lines], stop):
+                return
+        if pending:
+            _put(out_q, ["".join(pending)], stop)
+    finally:
+        _put(out_q, _DONE, stop)
+
+
+def _write_batches(
+    in_q: "queue.Queue[Any]", fh: TextIO, w: IndexedWriter | None, report: TextIO | None, stop: threading.Event
+) -> None:
+    try:
+        first_report_line = True
+        while True:
+            item = _get(in_q, stop)
+            if item is _DONE:
+                return
+            lines, report_lines = item
+            if w is None:
+                fh.write("".join(line for line, _ in lines))
+            else:
+                for line, doc in lines:
+                    w.write(line, doc)
+            if report is not None and report_lines:
+                # same file content as "\n".join(all report lines)
+                if not first_report_line:
+                    report.write("\n")
+                report.write("\n".join(report_lines))
+                first_report_line = False
+    except BaseException:
+        stop.set()
+        raise
+
+
+def _run_sequential(
+    r: TextIO, fh: TextIO, w: IndexedWriter | None, rep: TextIO | None, repair: RepairFn, describe: DescribeFn
+) -> Tuple[int, int]:
+    """The default process_pack loop: one line at a time, report lines written as they come."""
+    patched = 0
+    line_no = 0
+    write = fh.write if w is None else w.write
+    for line_no, line in enumerate(r, start=1):
+        raw = line.rstrip("\n")
+        if not raw.strip():
+            write(line)
+            continue
+
+        try:
+            doc = json.loads(raw)
+        except json.JSONDecodeError:
+            write(line)
+            continue
+
+        if not isinstance(doc, dict):
+            write(line)
+            continue
+
+        changed, changes = repair(doc)
+        if changed:
+            patched += 1
+            if rep is not None:
+                # same file content as "\n".join(all report lines)
+                if patched > 1:
+                    rep.write("\n")
+                rep.write(describe(line_no, doc, changes))
+
+        out = json.dumps(doc, ensure_ascii=False) + "\n"
+        if w is None:
+            fh.write(out)
+        else:
+            w.write(out, doc)
+
+    return patched, line_no
+
+
+def _run_pipeline(
+    r: TextIO,
+    fh: TextIO,
+    w: IndexedWriter | None,
+    rep: TextIO | None,
+    repair: RepairFn,
+    describe: DescribeFn,
+    queue_depth: int,
+    read_block: int,
+) -> Tuple[int, int]:
+    """
+    Reader thread -> repair loop (this thread) -> writer thread, connected by queues of
+    at most queue_depth line batches. Same output as the sequential loop in process_pack.
+    """
+    patched = 0
+    line_no = 0
+    stop = threading.Event()
+    read_q: "queue.Queue[Any]" = queue.Queue(maxsize=queue_depth)
+    write_q: "queue.Queue[Any]" = queue.Queue(maxsize=queue_depth)
+
+    reader = _Stage(_read_batches, r, read_q, stop, read_block)
+    writer = _Stage(_write_batches, write_q, fh, w, rep, stop)
+    reader.start()
+    writer.start()
+
+    try:
+        while True:
+            batch = _get(read_q, stop)
+            if batch is _DONE:
+                break
+
+            out: List[Tuple[str, Dict[str, Any] | None]] = []
+            report_lines: List[str] = []
+            for line in batch:
+                line_no += 1
+                raw = line.rstrip("\n")
+                if not raw.strip():
+                    out.append((line, None))
+                    continue
+
+                try:
+                    doc = json.loads(raw)
+                except json.JSONDecodeError:
+                    out.append((line, None))
+                    continue
+
+                if not isinstance(doc, dict):
+                    out.append((line, None))
+                    continue
+
+                changed, changes = repair(doc)
+                if changed:
+                    patched += 1
+                    if rep is not None:
+                        report_lines.append(describe(line_no, doc, changes))
+
+                out.append((json.dumps(doc, ensure_ascii=False) + "\n", doc))
+
+            if not _put(write_q, (out, report_lines), stop):
+                break
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        _put(write_q, _DONE, stop)
+        reader.join()
+        writer.join()
+
+    for stage in (reader, writer):
+        if stage.error is not None:
+            raise stage.error
+
+    return patched, line_no
+
+
+def pipeline_options(args: argparse.Namespace) -> Dict[str, Any]:
+    """process_pack keyword arguments from the --pipeline/--queue-depth/--read-block options."""
+    return {"pipeline": args.pipeline, "queue_depth": args.queue_depth, "read_block": args.read_block}
+
+
+def process_pack(
+    inp: Path,
+    outp: Path,
+    repair: RepairFn,
+    describe: DescribeFn = describe_doc,
+    backup: bool = False,
+    report_path: Path | None = None,
+    index: bool = False,
+    pipeline: bool = False,
+    queue_depth: int = QUEUE_DEPTH,
+    read_block: int = READ_BLOCK,
+) -> Tuple[int, int]:
+    """
+    Process one .db (NeDB JSON-lines) file with the given repair function.
+    Lines that are not JSON objects are copied unchanged; every document is re-serialized.
+    Report lines are written as they come, so memory does not grow with the pack size.
+    With index=True also writes the <outp>.index.json compendium index sidecar.
+
+    With pipeline=True reading and writing (output + report) run in their own threads,
+    connected to the repair loop by bounded queues (queue_depth batches of read_block
+    characters), so slow disk/network I/O overlaps with the JSON work. On local disk
+    the sequential loop is as fast or faster.
+    Returns (patched_docs, total_lines).
+    """
+    if pipeline and (queue_depth < 1 or read_block < 1):
+        raise ValueError(f"queue_depth and read_block must be >= 1 (got {queue_depth}, {read_block})")
+
+    outp.parent.mkdir(parents=True, exist_ok=True)
+
+    if backup:
+        bak = outp.with_suffix(outp.suffix + ".bak")
+        shutil.copy2(inp, bak)
+
+    if report_path is not None:
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with inp.open("r", encoding="utf-8", errors="replace") as r, outp.open(
+        "w", encoding="utf-8", newline="\n"
+    ) as fh, (report_path.open("w", encoding="utf-8") if report_path is not None else nullcontext()) as rep:
+        # offsets are only counted when a sidecar is wanted
+        w = IndexedWriter(fh) if index else None
+        if pipeline:
+            patched, line_no = _run_pipeline(r, fh, w, rep, repair, describe, queue_depth, read_block)
+        else:
+            patched, line_no = _run_sequential(r, fh, w, rep, repair, describe)
+
+    if w is not None:
+        w.save(outp)
+
+    return patched, line_no
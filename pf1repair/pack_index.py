@@ -0,0 +1,153 @@
+"""
+Compendium index sidecars (<pack>.db.index.json) and seek-based lookup of single documents.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, TextIO
+
+
+# Same fields Foundry puts into a compendium index, plus where the line lives in the .db
+INDEX_FIELDS = ["_id", "name", "type", "img", "sort", "offset", "length"]
+INDEX_SUFFIX = ".index.json"
+
+
+def index_path_for(db_path: Path) -> Path:
+    """pf-traits.db -> pf-traits.db.index.json"""
+    return db_path.with_name(db_path.name + INDEX_SUFFIX)
+
+
+def index_row(doc: Dict[str, Any], offset: int, length: int) -> List[Any]:
+    return [doc["_id"], doc.get("name"), doc.get("type"), doc.get("img"), doc.get("sort"), offset, length]
+
+
+def write_index(index_path: Path, db_path: Path, rows: List[List[Any]]) -> Path:
+    """Write the sidecar; call it after db_path is closed, its size is stored for the staleness check."""
+    data = {"pack": db_path.name, "size": db_path.stat().st_size, "fields": INDEX_FIELDS, "rows": rows}
+    index_path.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    return index_path
+
+
+class IndexedWriter:
+    """
+    Wraps the text output of a pack and counts the bytes written, so every
+    document can be recorded with its byte offset/length in the output file.
+    Lines must be written whole (one write() call per line).
+    """
+
+    def __init__(self, w: TextIO) -> None:
+        self.w = w
+        self.offset = 0
+        self.rows: List[List[Any]] = []
+
+    def write(self, line: str, doc: Dict[str, Any] | None = None) -> None:
+        self.w.write(line)
+        length = len(line.encode("utf-8"))
+        if doc is not None and isinstance(doc.get("_id"), str):
+            # length without the trailing newline
+            self.rows.append(index_row(doc, self.offset, length - 1))
+        self.offset += length
+
+    def save(self, db_path: Path, index_path: Path | None = None) -> Path:
+        """Write the sidecar for db_path (the file that was just written)."""
+        return write_index(index_path or index_path_for(db_path), db_path, self.rows)
+
+
+def build_index(db_path: Path, index_path: Path | None = None) -> Path:
+    """Build a sidecar for an existing .db without rewriting it."""
+    rows: List[List[Any]] = []
+    offset = 0
+    with db_path.open("rb") as r:
+        for raw in r:
+            length = len(raw)
+            line = raw.rstrip(b"\r\n")
+            if line.strip():
+                try:
+                    doc = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    doc = None
+                if isinstance(doc, dict) and isinstance(doc.get("_id"), str):
+                    rows.append(index_row(doc, offset, len(line)))
+            offset += length
+
+    return write_index(index_path or index_path_for(db_path), db_path, rows)
+
+
+class PackIndex:
+    """
+    Read side: load the sidecar of a pack and fetch single documents by _id
+    with one seek + one line parse, without reading the rest of the pack.
+
+        idx = PackIndex(Path("packs/pf-traits.db"))
+        idx.entries()            # [{"_id":..., "name":..., "type":..., "img":..., "sort":...}, ...]
+        idx.get("0HgCuGvPWbtlGjTV")
+    """
+
+    def __init__(self, db_path: Path, index_path: Path | None = None) -> None:
+        self.db_path = db_path
+        self.index_path = index_path or index_path_for(db_path)
+        data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        if data.get("fields") != INDEX_FIELDS:
+            raise ValueError(f"unsupported index format: {self.index_path}")
+        # no mtime check: copies and checkouts change it, but the index stays valid
+        if data.get("size") != db_path.stat().st_size:
+            raise ValueError(f"stale index (pack was modified after the index was built, rebuild it): {self.index_path}")
+        self.rows: List[List[Any]] = data["rows"]
+        self._by_id: Dict[str, List[Any]] = {row[0]: row for row in self.rows}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, _id: object) -> bool:
+        return _id in self._by_id
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Compendium index entries (_id, name, type, img, sort) in file order."""
+        return [dict(zip(INDEX_FIELDS[:5], row[:5])) for row in self.rows]
+
+    def _load(self, r: BinaryIO, row: List[Any]) -> Dict[str, Any]:
+        r.seek(row[5])
+        raw = r.read(row[6])
+        try:
+            doc = json.loads(raw)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            doc = None
+        # the same size can still hide a rewrite; the line must be the indexed doc
+        if not isinstance(doc, dict) or doc.get("_id") != row[0]:
+            raise ValueError(f"stale index (no document {row[0]!r} at offset {row[5]}, rebuild it): {self.index_path}")
+        return doc
+
+    def get(self, _id: str) -> Dict[str, Any] | None:
+        row = self._by_id.get(_id)
+        if row is None:
+            return None
+        with self.db_path.open("rb") as r:
+            return self._load(r, row)
+
+    def iter_docs(self, ids: List[str]) -> Iterator[Dict[str, Any]]:
+        """Fetch several documents with one open file handle, in file order."""
+        rows = sorted((self._by_id[i] for i in ids if i in self._by_id), key=lambda row: row[5])
+        with self.db_path.open("rb") as r:
+            for row in rows:
+                yield self._load(r, row)
+
+
+def run(args: argparse.Namespace) -> int:
+    if not args.folder.exists() or not args.folder.is_dir():
+        print(f"ERROR: folder not found: {args.folder}")
+        return 2
+
+    pattern = "**/*.db" if args.recursive else "*.db"
+    db_files = sorted(args.folder.glob(pattern))
+    if not db_files:
+        print(f"No .db files found in {args.folder} (recursive={args.recursive})")
+        return 0
+
+    for i, db in enumerate(db_files, start=1):
+        out = build_index(db)
+        print(f"[{i}/{len(db_files)}] {db.relative_to(args.folder)} -> {out.name}")
+
+    return 0
+
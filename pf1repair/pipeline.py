@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import argparse
+import importlib
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from .common import RepairFn, describe_doc, find_db_files, format_trait_cache_stats, pipeline_options, process_pack
+
+
+# In the order the README runs the scripts
+REPAIRS = ("traits", "resistances", "identifiers")
+
+
+def load_repair_module(name: str):
+    if name not in REPAIRS:
+        raise ValueError(f"unknown repair {name!r} (expected one of {', '.join(REPAIRS)})")
+    return importlib.import_module(f".{name}", __package__)
+
+
+def get_repair(name: str, only_npc: bool = True) -> RepairFn:
+    mod = load_repair_module(name)
+    if name == "traits":
+        return partial(mod.repair, only_npc=only_npc)
+    return mod.repair
+
+
+def chain_repairs(names: Sequence[str], only_npc: bool = True) -> RepairFn:
+    """One RepairFn that runs the named repairs in order and collects all changes."""
+    fns = [get_repair(n, only_npc=only_npc) for n in names]
+
+    def repair(doc: Dict[str, Any]) -> Tuple[bool, List[str]]:
+        changed = False
+        changes: List[str] = []
+        for fn in fns:
+            c, ch = fn(doc)
+            if c:
+                changed = True
+                changes.extend(ch)
+        return changed, changes
+
+    return repair
+
+
+def repairs_for_pack(pack_name: str, names: Sequence[str] = REPAIRS) -> List[str]:
+    """The repairs the scripts would run on a pack file with this name."""
+    return [n for n in names if load_repair_module(n).applies_to(pack_name)]
+
+
+def repair_docs(
+    docs: Iterable[Dict[str, Any]],
+    repairs: Sequence[str] = REPAIRS,
+    only_npc: bool = True,
+) -> Iterator[Tuple[Dict[str, Any], List[str]]]:
+    """
+    In-process API: repair documents without any file round-trip.
+    Documents are modified in place; yields (doc, changes) for every input doc
+    (changes is empty if nothing was touched). Pack-file targeting does not apply here,
+    every requested repair runs on every doc it selects by type.
+
+        for doc, changes in repair_docs(docs):
+            ...
+    """
+    repair = chain_repairs(repairs, only_npc=only_npc)
+    for doc in docs:
+        if not isinstance(doc, dict):
+            yield doc, []
+            continue
+        _, changes = repair(doc)
+        yield doc, changes
+
+
+def run(args: argparse.Namespace) -> int:
+    """`all`: every applicable repair in one read/write pass per pack."""
+    in_dir = args.packages
+    out_dir = args.packages_processed
+    if not in_dir.exists() or not in_dir.is_dir():
+        print(f"ERROR: packages folder not found: {in_dir}")
+        return 2
+
+    db_files = find_db_files(in_dir, args.recursive)
+    if not db_files:
+        print(f"No .db files found in {in_dir} (recursive={args.recursive})")
+        return 0
+
+    report_dir = (out_dir / "_reports") if args.reports else None
+
+    total_patched = 0
+    for i, inp in enumerate(db_files, start=1):
+        rel = inp.relative_to(in_dir)
+        names = repairs_for_pack(inp.name)
+        patched, _ = process_pack(
+            inp,
+            out_dir / rel,
+            chain_repairs(names, only_npc=args.only_npc),
+            describe_doc,
+            backup=args.backup,
+            report_path=(report_dir / (inp.name + ".repair_report.txt")) if report_dir else None,
+            index=args.index,
+            **pipeline_options(args),
+        )
+        total_patched += patched
+        print(f"[{i}/{len(db_files)}] {rel} -> patched_docs={patched} ({', '.join(names)})")
+
+    print("\nDone.")
+    print(f"Processed files: {len(db_files)}")
+    print(f"Patched docs total: {total_patched}")
+    print(f"Output folder: {out_dir}")
+    print(format_trait_cache_stats())
+    if report_dir is not None:
+        print(f"Reports folder: {report_dir}")
+
+    return 0
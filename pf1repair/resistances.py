@@ -0,0 +1,193 @@
+"""
+Character / resistance repair: eres, dr, dv must be dicts with list values
+(fixes "Cannot read properties of undefined (reading 'forEach')").
+"""
+from __future__ import annotations
+
+import argparse
+from typing import Any, Dict, List, Tuple
+
+from .common import (
+    clean_str_list,
+    convert_plus_number_strings,
+    ensure_dict_path,
+    find_db_files,
+    format_trait_cache_stats,
+    get,
+    pipeline_options,
+    process_pack,
+    str_to_list,
+)
+
+
+# Nur diese Pack-Dateien sollen verarbeitet werden
+TARGET_FILES = {
+    "pf-companions.db",
+    "pf-eidolon-forms.db",
+    "pf-familiars.db",
+    "pf-merchants.db",
+    "pf-traps-and-haunts.db",
+}
+
+
+def applies_to(pack_name: str) -> bool:
+    return pack_name in TARGET_FILES
+
+
+def ensure_trait_arrays(traits: Dict[str, Any], key: str, changes: List[str]) -> bool:
+    """
+    Ensure system.traits.<key> exists and has:
+      - value as list (default [])
+      - custom/customTotal as list if present as string
+    Returns changed?
+    """
+    changed = False
+
+    if key not in traits or not isinstance(traits.get(key), dict):
+        traits[key] = {}
+        changed = True
+        changes.append(f"traits.{key}: created dict")
+
+    trait = traits[key]
+    assert isinstance(trait, dict)
+
+    # Ensure value is list (this fixes value.forEach crashes)
+    v = trait.get("value", None)
+    if v is None:
+        trait["value"] = []
+        changed = True
+        changes.append(f"traits.{key}.value: None/missing -> []")
+    elif isinstance(v, str):
+        # some bad imports store "fire; cold" as string
+        trait["value"] = str_to_list(v)
+        changed = True
+        changes.append(f"traits.{key}.value: str -> list")
+    elif isinstance(v, list):
+        # clean list
+        cleaned = clean_str_list(v)
+        if cleaned is not None:
+            trait["value"] = cleaned
+            changed = True
+            changes.append(f"traits.{key}.value: cleaned list")
+    else:
+        # any other type -> safest default
+        trait["value"] = []
+        changed = True
+        changes.append(f"traits.{key}.value: invalid type -> []")
+
+    # Ensure custom/customTotal are lists if they exist as strings
+    for field in ("custom", "customTotal"):
+        val = trait.get(field)
+        if isinstance(val, str):
+            trait[field] = str_to_list(val)
+            changed = True
+            changes.append(f"traits.{key}.{field}: str -> list")
+
+        elif isinstance(val, list):
+            cleaned = clean_str_list(val)
+            if cleaned is not None:
+                trait[field] = cleaned
+                changed = True
+                changes.append(f"traits.{key}.{field}: cleaned list")
+
+    return changed
+
+
+def repair_actor_doc(doc: Dict[str, Any]) -> Tuple[bool, List[str]]:
+    """
+    Repair a single actor doc for PF1 Character-sheet resistance parsing.
+    """
+    changes: List[str] = []
+    changed = False
+
+    # Only act on documents that look like PF1 actors with system.traits
+    traits = get(doc, "system.traits")
+    if not isinstance(traits, dict):
+        # still normalize +numbers globally
+        if convert_plus_number_strings(doc):
+            changed = True
+            changes.append("global: converted +N strings")
+        return changed, changes
+
+    # These are the usual suspects for parseResistances / trait iteration:
+    # - eres: energy resistances
+    # - dr: damage reduction
+    # - dv: damage vulnerabilities / immunities sometimes referenced nearby
+    for key in ("eres", "dr", "dv"):
+        if ensure_trait_arrays(traits, key, changes):
+            changed = True
+
+    # Also: nulls in languages.value can still exist
+    lang_val = get(doc, "system.traits.languages.value")
+    if isinstance(lang_val, list):
+        nulls = sum(1 for x in lang_val if x is None)
+        if nulls:
+            ensure_dict_path(doc, "system.traits.languages")
+            doc["system"]["traits"]["languages"]["value"] = [x for x in lang_val if x is not None]
+            changed = True
+            changes.append(f"languages.value: removed {nulls} null(s)")
+
+    # Normalize "+2" strings anywhere (prevents the jquery number-input warning)
+    if convert_plus_number_strings(doc):
+        changed = True
+        changes.append("global: converted +N strings")
+
+    return changed, changes
+
+
+def should_patch_doc(doc: Dict[str, Any]) -> bool:
+    """
+    We target actors that might render in ActorSheetPFCharacter.
+    In PF1 these are commonly type 'character' (and sometimes 'npc' in some packs).
+    """
+    t = doc.get("type")
+    return t in ("character", "npc")
+
+
+def repair(doc: Dict[str, Any]) -> Tuple[bool, List[str]]:
+    if not should_patch_doc(doc):
+        return False, []
+    return repair_actor_doc(doc)
+
+
+def run(args: argparse.Namespace) -> int:
+    in_dir = args.packages
+    out_dir = args.packages_processed
+
+    if not in_dir.exists() or not in_dir.is_dir():
+        print(f"ERROR: packages folder not found: {in_dir}")
+        return 2
+
+    targets = [p for p in find_db_files(in_dir, args.recursive) if applies_to(p.name)]
+    if not targets:
+        print("No target .db files found. Looking for:")
+        for f in sorted(TARGET_FILES):
+            print(f" - {f}")
+        print(f"In folder: {in_dir} (recursive={args.recursive})")
+        return 0
+
+    report_dir = (out_dir / "_reports") if args.reports else None
+
+    total_patched = 0
+    for i, inp in enumerate(targets, start=1):
+        rel = inp.relative_to(in_dir)
+        patched, _ = process_pack(
+            inp,
+            out_dir / rel,
+            repair,
+            backup=args.backup,
+            report_path=(report_dir / (inp.name + ".repair_report.txt")) if report_dir else None,
+            index=args.index,
+            **pipeline_options(args),
+        )
+        total_patched += patched
+        print(f"[{i}/{len(targets)}] {rel} -> patched_docs={patched}")
+
+    print("\nDone.")
+    print(f"Output folder: {out_dir}")
+    print(f"Patched docs total: {total_patched}")
+    print(format_trait_cache_stats())
+    if report_dir is not None:
+        print(f"Reports folder: {report_dir}")
+
+    return 0
@@ -0,0 +1,144 @@
+"""
+NPC & trait repair: system.traits.*.custom strings -> arrays (fixes n.forEach crash)
+and '+N' numeric strings -> ints.
+"""
+from __future__ import annotations
+
+import argparse
+from functools import partial
+from typing import Any, Dict, List, Tuple
+
+from .common import (
+    clean_str_list,
+    convert_plus_number_strings,
+    ensure_dict_path,
+    find_db_files,
+    format_trait_cache_stats,
+    get,
+    pipeline_options,
+    process_pack,
+    str_to_list,
+)
+
+
+TRAIT_KEYS = ["di", "dv", "ci", "languages", "armorProf", "weaponProf"]
+
+
+def applies_to(pack_name: str) -> bool:
+    return True
+
+
+def repair_doc(doc: Dict[str, Any]) -> Tuple[bool, List[str]]:
+    changes: List[str] = []
+    changed = False
+
+    # We'll patch anything that has system.traits.<...>
+    traits = get(doc, "system.traits")
+    if not isinstance(traits, dict):
+        # Still run +number conversion globally (can fix input-number warnings in other docs)
+        if convert_plus_number_strings(doc, changes):
+            changed = True
+        return changed, changes
+
+    # 1) Fix languages.value: remove nulls (this one also causes weirdness elsewhere)
+    lang_val = get(doc, "system.traits.languages.value")
+    if isinstance(lang_val, list):
+        nulls = sum(1 for x in lang_val if x is None)
+        if nulls:
+            ensure_dict_path(doc, "system.traits.languages")
+            doc["system"]["traits"]["languages"]["value"] = [x for x in lang_val if x is not None]
+            changed = True
+            changes.append(f"languages.value: removed {nulls} null(s)")
+
+    # 2) The real crash-fix: custom/customTotal must be arrays, not strings
+    for k in TRAIT_KEYS:
+        trait = traits.get(k)
+        if not isinstance(trait, dict):
+            continue
+
+        for field in ("custom", "customTotal"):
+            val = trait.get(field)
+            if isinstance(val, str):
+                new_list = str_to_list(val)
+                trait[field] = new_list  # type: ignore[assignment]
+                changed = True
+                changes.append(f"{k}.{field}: str -> list ({len(new_list)} item(s))")
+
+            elif val is None:
+                pass
+            elif isinstance(val, list):
+                cleaned = clean_str_list(val)
+                if cleaned is not None:
+                    trait[field] = cleaned  # type: ignore[assignment]
+                    changed = True
+                    changes.append(f"{k}.{field}: cleaned list")
+
+    # 3) Optional: If someone stored value as a single string with separators,
+    # convert to list (PF1 already wraps non-array into [value], but this makes it nicer)
+    for k in ("di", "dv", "ci"):
+        trait = traits.get(k)
+        if not isinstance(trait, dict):
+            continue
+        v = trait.get("value")
+        if isinstance(v, str) and (";" in v or "," in v):
+            new_v = str_to_list(v)
+            trait["value"] = new_v
+            changed = True
+            changes.append(f"{k}.value: split str -> list ({len(new_v)} item(s))")
+
+    # 4) Fix UI warning: convert "+2" style strings to ints across the document
+    if convert_plus_number_strings(doc, changes):
+        changed = True
+
+    return changed, changes
+
+
+def repair(doc: Dict[str, Any], only_npc: bool = True) -> Tuple[bool, List[str]]:
+    """repair_doc for every document, or only for type=='npc' (recommended)."""
+    if only_npc and doc.get("type") != "npc":
+        return False, []
+    return repair_doc(doc)
+
+
+def run(args: argparse.Namespace) -> int:
+    in_dir = args.packages
+    out_dir = args.packages_processed
+    if not in_dir.exists() or not in_dir.is_dir():
+        print(f"ERROR: packages folder not found: {in_dir}")
+        return 2
+
+    db_files = find_db_files(in_dir, args.recursive)
+    if not db_files:
+        print(f"No .db files found in {in_dir} (recursive={args.recursive})")
+        return 0
+
+    report_dir = (out_dir / "_reports") if args.reports else None
+
+    total_files = 0
+    total_patched = 0
+
+    for inp in db_files:
+        rel = inp.relative_to(in_dir)
+        patched, _ = process_pack(
+            inp,
+            out_dir / rel,
+            partial(repair, only_npc=args.only_npc),
+            backup=args.backup,
+            report_path=(report_dir / (inp.name + ".repair_report.txt")) if report_dir else None,
+            index=args.index,
+            **pipeline_options(args),
+        )
+
+        total_files += 1
+        total_patched += patched
+        print(f"[{total_files}/{len(db_files)}] {rel} -> patched_docs={patched}")
+
+    print("\nDone.")
+    print(f"Processed files: {total_files}")
+    print(f"Patched docs total: {total_patched}")
+    print(f"Output folder: {out_dir}")
+    print(format_trait_cache_stats())
+    if report_dir is not None:
+        print(f"Reports folder: {report_dir}")
+
+    return 0
@@ -0,0 +1,384 @@
+"""
+Schema validation of PF1 actor/item documents: finds the data shapes that crash the
+Foundry sheets (n.forEach, reading 'forEach', Duplicate item identifier, "+2" inputs)
+without opening actors one by one.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+from .common import describe_doc, find_db_files, iter_db_docs
+from .identifiers import get_action_tag, get_item_tag, get_resources_dict, iter_actions
+
+
+# Schemas: path -> spec. Paths are dot-separated keys, "*" = every value of a dict,
+# "[*]" = every element of a list, "{a,b}" = the same rule for several keys,
+# a trailing "?" = the key may be missing (it is checked only if present).
+# "$" is the document itself. A tuple applies several specs to the same path.
+#
+# Specs: dict, list, str, bool, number (int/float), numeric (number or a plain
+# number string, no "+2"), list[str], list[dict], no-plus-number (no "+N" strings
+# anywhere), identifiers (item tags, action tags and system.resources keys of an actor
+# must not collide, what the identifiers repair fixes), @<schema> (validate with another
+# schema).
+Spec = Union[str, Tuple[str, ...]]
+
+ACTOR_SCHEMA: Dict[str, Spec] = {
+    "$": ("no-plus-number", "identifiers"),
+    "system": "dict",
+    "system.traits": "dict",
+    "system.traits.{di,dv,ci,languages,eres,dr}": "dict",
+    "system.traits.{armorProf,weaponProf}?": "dict",
+    "system.traits.{di,dv,ci,languages}.value": "list[str]",
+    "system.traits.{armorProf,weaponProf}.value?": "list[str]",
+    "system.traits.{eres,dr}.value": "list",
+    "system.traits.{di,dv,ci,languages,eres,dr,armorProf,weaponProf}.custom?": "list[str]",
+    "system.traits.{di,dv,ci,languages,eres,dr,armorProf,weaponProf}.customTotal?": "list[str]",
+    "system.traits.senses.{dv,ts,bs,bse}?": "number",
+    "system.resources?": "dict",
+    "system.resources.*": "dict",
+    "system.abilities?": "dict",
+    "system.abilities.*.value?": "number",
+    "system.attributes.hp.value?": "number",
+    "system.attributes.naturalAC?": "numeric",
+    "items": "list[dict]",
+    "items[*]": "@item",
+}
+
+ITEM_SCHEMA: Dict[str, Spec] = {
+    "$": "no-plus-number",
+    "system": "dict",
+    "system.tag?": "str",
+    "system.actions?": "list[dict]",
+    "system.actions[*].tag?": "str",
+    "system.changes?": "list[dict]",
+    "system.contextNotes?": "list[dict]",
+    "system.price?": "number",
+    "system.uses?": "dict",
+}
+
+SCHEMAS: Dict[str, Dict[str, Spec]] = {"actor": ACTOR_SCHEMA, "item": ITEM_SCHEMA}
+
+ACTOR_TYPES = ("character", "npc")
+ITEM_TYPES = ("attack", "buff", "class", "consumable", "container", "equipment", "feat", "implant", "loot", "race", "spell", "weapon")
+
+# (path, message) for every problem found
+Errors = List[Tuple[str, str]]
+Checker = Callable[[Any, str, Errors], None]
+
+PATH_TOKEN_RE = re.compile(r"\[\*\]|[^.\[]+")
+NUMERIC_STR_RE = re.compile(r"\s*-?(\d+(\.\d*)?|\.\d+)\s*")
+PLUS_NUMBER_MSG = '"+N" string'
+LEGACY_MSG = "legacy data-shaped document (not migrated)"
+
+
+def type_name(v: Any) -> str:
+    if v is None:
+        return "null"
+    return {dict: "dict", list: "list", str: "str", bool: "bool", int: "int", float: "float"}.get(type(v), type(v).__name__)
+
+
+def is_number(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def is_plus_number(v: str) -> bool:
+    s = v.strip()
+    return s.startswith("+") and s[1:].isdigit()
+
+
+def _find_plus_numbers(obj: Any, path: str, errors: Errors) -> None:
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            sub = f"{path}.{k}" if path else k
+            if isinstance(v, str):
+                if is_plus_number(v):
+                    errors.append((sub, f"{PLUS_NUMBER_MSG} {v!r}, expected number"))
+            else:
+                _find_plus_numbers(v, sub, errors)
+    elif isinstance(obj, list):
+        for i, v in enumerate(obj):
+            if isinstance(v, str):
+                if is_plus_number(v):
+                    errors.append((f"{path}[{i}]", f"{PLUS_NUMBER_MSG} {v!r}, expected number"))
+            else:
+                _find_plus_numbers(v, f"{path}[{i}]", errors)
+
+
+def _find_identifier_collisions(actor: Any, path: str, errors: Errors) -> None:
+    """Same passes as identifiers.fix_actor_identifiers_and_resources, reporting instead of renaming."""
+    if not isinstance(actor, dict) or not isinstance(actor.get("items"), list):
+        return
+    prefix = f"{path}." if path else ""
+    items = [(i, it) for i, it in enumerate(actor["items"]) if isinstance(it, dict)]
+
+    # 1) item tags must be unique
+    item_tags: Dict[str, str] = {}
+    for i, it in items:
+        tag = get_item_tag(it)
+        if not tag:
+            continue
+        if tag in item_tags:
+            errors.append((f"{prefix}items[{i}].system.tag", f"duplicate item tag {tag!r} (also at {item_tags[tag]})"))
+        else:
+            item_tags[tag] = f"{prefix}items[{i}].system.tag"
+
+    # 2) action tags must not repeat an item tag or an earlier action tag
+    seen = dict(item_tags)
+    for i, it in items:
+        for k, act in enumerate(iter_actions(it)):
+            a_tag = get_action_tag(act)
+            if not a_tag:
+                continue
+            if a_tag in seen:
+                errors.append((f"{prefix}items[{i}].system.actions[{k}].tag", f"action tag {a_tag!r} collides with {seen[a_tag]}"))
+            else:
+                seen[a_tag] = f"{prefix}items[{i}].system.actions[{k}].tag"
+
+    # 3) a resource key equal to an item tag is a duplicate identifier
+    res = get_resources_dict(actor)
+    if res is not None:
+        for key in res:
+            if key in item_tags:
+                errors.append((f"{prefix}system.resources.{key}", f"resource key collides with item tag at {item_tags[key]}"))
+
+
+def _spec_check(spec: str, compiled: Dict[str, Checker]) -> Checker:
+    """Checker for one spec."""
+
+    def simple(ok: Callable[[Any], bool], expected: str) -> Checker:
+        def check(v: Any, path: str, errors: Errors) -> None:
+            if not ok(v):
+                errors.append((path, f"expected {expected}, got {type_name(v)}"))
+
+        return check
+
+    def list_of(item_type: type, expected: str) -> Checker:
+        def check(v: Any, path: str, errors: Errors) -> None:
+            if not isinstance(v, list):
+                errors.append((path, f"expected list[{expected}], got {type_name(v)}"))
+                return
+            for i, x in enumerate(v):
+                if not isinstance(x, item_type):
+                    errors.append((f"{path}[{i}]", f"expected {expected}, got {type_name(x)}"))
+
+        return check
+
+    if spec == "dict":
+        return simple(lambda v: isinstance(v, dict), "dict")
+    if spec == "list":
+        return simple(lambda v: isinstance(v, list), "list")
+    if spec == "str":
+        return simple(lambda v: isinstance(v, str), "str")
+    if spec == "bool":
+        return simple(lambda v: isinstance(v, bool), "bool")
+    if spec == "number":
+        return simple(is_number, "number")
+    if spec == "numeric":
+        return simple(lambda v: is_number(v) or (isinstance(v, str) and NUMERIC_STR_RE.fullmatch(v) is not None), "number")
+    if spec == "list[str]":
+        return list_of(str, "str")
+    if spec == "list[dict]":
+        return list_of(dict, "dict")
+    if spec == "no-plus-number":
+        return _find_plus_numbers
+    if spec == "identifiers":
+        return _find_identifier_collisions
+
+    if spec.startswith("@"):
+        name = spec[1:]
+        if name not in SCHEMAS:
+            raise ValueError(f"unknown schema {name!r}")
+
+        # resolved on first use, so schemas can refer to each other
+        def check_sub(v: Any, path: str, errors: Errors) -> None:
+            if name not in compiled:
+                compiled[name] = compile_schema(SCHEMAS[name], compiled)
+            compiled[name](v, path, errors)
+
+        return check_sub
+
+    raise ValueError(f"unknown spec {spec!r}")
+
+
+class _Node:
+    def __init__(self) -> None:
+        self.checks: List[Checker] = []
+        self.required = False
+        self.children: Dict[str, _Node] = {}
+
+
+def _expand(path: str) -> List[Tuple[List[str], bool]]:
+    """'a.{b,c}.d?' -> [(['a','b','d'], optional), (['a','c','d'], optional)]"""
+    path = path.strip()
+    optional = path.endswith("?")
+    if optional:
+        path = path[:-1]
+    if path == "$":
+        return [([], optional)]
+    alternatives = []
+    for tok in PATH_TOKEN_RE.findall(path):
+        if tok.startswith("{") and tok.endswith("}"):
+            alternatives.append([t.strip() for t in tok[1:-1].split(",")])
+        else:
+            alternatives.append([tok])
+    return [(list(p), optional) for p in itertools.product(*alternatives)]
+
+
+def _compile_node(node: _Node) -> Checker:
+    checks = node.checks
+    keys = [(k, child.required, _compile_node(child)) for k, child in node.children.items() if k not in ("*", "[*]")]
+    each_value = _compile_node(node.children["*"]) if "*" in node.children else None
+    each_item = _compile_node(node.children["[*]"]) if "[*]" in node.children else None
+
+    def check(v: Any, path: str, errors: Errors) -> None:
+        for c in checks:
+            c(v, path, errors)
+
+        # rules below a wrongly typed value can't apply, its own error is enough
+        if isinstance(v, dict):
+            for k, required, child in keys:
+                sub = f"{path}.{k}" if path else k
+                if k in v:
+                    child(v[k], sub, errors)
+                elif required:
+                    errors.append((sub, "missing"))
+            if each_value is not None:
+                for k, x in v.items():
+                    each_value(x, f"{path}.{k}" if path else k, errors)
+        elif isinstance(v, list) and each_item is not None:
+            for i, x in enumerate(v):
+                each_item(x, f"{path}[{i}]", errors)
+
+    return check
+
+
+def compile_schema(schema: Dict[str, Spec], compiled: Dict[str, Checker] | None = None) -> Checker:
+    """
+    Turn a declarative schema into one checker function: checker(doc, path_prefix, errors).
+    Rules sharing a path prefix share the dict lookups (they are merged into one tree).
+    """
+    compiled = {} if compiled is None else compiled
+    root = _Node()
+    for path, specs in schema.items():
+        for segments, optional in _expand(path):
+            node = root
+            for seg in segments:
+                node = node.children.setdefault(seg, _Node())
+            # "key" -> missing is an error; "*" / "[*]" can't be missing
+            if segments and segments[-1] not in ("*", "[*]") and not optional:
+                node.required = True
+            for spec in (specs,) if isinstance(specs, str) else specs:
+                node.checks.append(_spec_check(spec, compiled))
+    return _compile_node(root)
+
+
+_CHECKERS: Dict[str, Checker] = {}
+
+
+def checker_for(doc: Dict[str, Any]) -> Checker | None:
+    t = doc.get("type")
+    if t in ACTOR_TYPES:
+        name = "actor"
+    elif t in ITEM_TYPES:
+        # selected by type, so a missing or non-dict system is reported, not skipped
+        name = "item"
+    else:
+        # journals, tables, scenes ... have no PF1 system data
+        return None
+    if name not in _CHECKERS:
+        _CHECKERS[name] = compile_schema(SCHEMAS[name], _CHECKERS)
+    return _CHECKERS[name]
+
+
+def is_legacy(doc: Dict[str, Any]) -> bool:
+    """Pre-v10 document with "data" instead of "system"; Foundry migrates it on load."""
+    return "system" not in doc and isinstance(doc.get("data"), dict)
+
+
+def validate_doc(doc: Dict[str, Any]) -> Errors:
+    """All (path, message) problems of one document; empty if it matches its schema."""
+    checker = checker_for(doc)
+    if checker is not None and is_legacy(doc):
+        return [("data", LEGACY_MSG)]
+    errors: Errors = []
+    if checker is not None:
+        checker(doc, "", errors)
+    # a "+2" in a typed field is also found by no-plus-number; keep the type error only.
+    # Other rules can report different problems for the same path, all of them are kept.
+    typed = {p for p, msg in errors if not msg.startswith(PLUS_NUMBER_MSG)}
+    result: Errors = []
+    seen = set()
+    for e in errors:
+        if e in seen or (e[0] in typed and e[1].startswith(PLUS_NUMBER_MSG)):
+            continue
+        seen.add(e)
+        result.append(e)
+    return result
+
+
+def validate_pack(path: Path) -> Tuple[int, List[str], List[str]]:
+    """
+    (checked_docs, report lines of the invalid ones, report lines of the legacy ones) for one .db file.
+    Legacy data-shaped documents are not schema errors and are kept apart.
+    """
+    checked = 0
+    lines: List[str] = []
+    legacy: List[str] = []
+    for line_no, doc in iter_db_docs(path):
+        if checker_for(doc) is None:
+            continue
+        checked += 1
+        errors = validate_doc(doc)
+        if errors:
+            target = legacy if is_legacy(doc) else lines
+            target.append(describe_doc(line_no, doc, [f"{p}: {msg}" for p, msg in errors]))
+    return checked, lines, legacy
+
+
+def run(args: argparse.Namespace) -> int:
+    folder: Path = args.folder
+    if not folder.exists() or not folder.is_dir():
+        print(f"ERROR: folder not found: {folder}")
+        return 2
+
+    db_files = find_db_files(folder, args.recursive)
+    if not db_files:
+        print(f"No .db files found in {folder} (recursive={args.recursive})")
+        return 0
+
+    report_lines: List[str] = []
+    legacy_lines: List[str] = []
+    total_checked = 0
+    total_invalid = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for i, (db, (checked, lines, legacy)) in enumerate(zip(db_files, pool.map(validate_pack, db_files)), start=1):
+            rel = db.relative_to(folder)
+            total_checked += checked
+            total_invalid += len(lines)
+            report_lines.extend(f"{rel}: {line}" for line in lines)
+            legacy_lines.extend(f"{rel}: {line}" for line in legacy)
+            print(
+                f"[{i}/{len(db_files)}] {rel} -> checked_docs={checked}, invalid_docs={len(lines)}"
+                + (f", legacy_docs={len(legacy)}" if legacy else "")
+            )
+
+    if args.report is not None:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text("\n".join(report_lines + legacy_lines), encoding="utf-8")
+
+    print("\nDone.")
+    print(f"Checked docs total: {total_checked}")
+    print(f"Invalid docs total: {total_invalid}")
+    if legacy_lines:
+        print(f"Legacy data-shaped docs (not migrated, not counted as invalid): {len(legacy_lines)}")
+    if args.report is not None:
+        print(f"Report: {args.report}")
+
+    return 1 if total_invalid else 0
@@ -0,0 +1,180 @@
+"""
+Differential verification of repaired packs against a reference tree (canonical
+per-document hashes, matched by _id) and idempotence of the repairs.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .common import find_db_files, iter_db_docs
+from .pipeline import get_repair, repairs_for_pack
+
+
+def canonical(doc: Any) -> bytes:
+    """Formatting-independent form of a document (key order and whitespace don't matter)."""
+    return json.dumps(doc, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def doc_key(line_no: int, doc: Dict[str, Any]) -> str:
+    _id = doc.get("_id")
+    return _id if isinstance(_id, str) and _id else f"line {line_no}"
+
+
+def hash_pack(path: Path) -> Tuple[Dict[str, str], Dict[str, int]]:
+    """
+    (_id -> sha1 of the canonical document, _id -> count of the _ids that occur more than once)
+    for one .db file. A repeated _id keeps the hash of its last document, the one NeDB loads.
+    """
+    hashes: Dict[str, str] = {}
+    counts: Dict[str, int] = {}
+    for line_no, doc in iter_db_docs(path):
+        k = doc_key(line_no, doc)
+        if k in hashes:
+            counts[k] = counts.get(k, 1) + 1
+        hashes[k] = hashlib.sha1(canonical(doc)).hexdigest()
+    return hashes, counts
+
+
+def load_docs(path: Path, keys: set[str]) -> Dict[str, Dict[str, Any]]:
+    """Load only the documents with the given keys (used for the few that differ), last one per _id."""
+    docs: Dict[str, Dict[str, Any]] = {}
+    for line_no, doc in iter_db_docs(path):
+        k = doc_key(line_no, doc)
+        if k in keys:
+            docs[k] = doc
+    return docs
+
+
+def first_diff(a: Any, b: Any, path: str = "") -> str | None:
+    """JSON path of the first difference between a and b (keys sorted), or None if equal."""
+    if isinstance(a, dict) and isinstance(b, dict):
+        for k in sorted(set(a) | set(b)):
+            sub = f"{path}.{k}" if path else k
+            if k not in a or k not in b:
+                return sub
+            d = first_diff(a[k], b[k], sub)
+            if d is not None:
+                return d
+        return None
+    if isinstance(a, list) and isinstance(b, list):
+        for i, (x, y) in enumerate(zip(a, b)):
+            d = first_diff(x, y, f"{path}[{i}]")
+            if d is not None:
+                return d
+        if len(a) != len(b):
+            return f"{path}[{min(len(a), len(b))}]"
+        return None
+    if type(a) is not type(b) or a != b:
+        return path or "<root>"
+    return None
+
+
+def compare_pack(args: Tuple[Path, Path]) -> List[str]:
+    """Compare two versions of one pack; returns report lines (empty if equal)."""
+    ref_path, new_path = args
+    ref, ref_dups = hash_pack(ref_path)
+    new, new_dups = hash_pack(new_path)
+
+    lines: List[str] = []
+    # NeDB keeps only the last of them, so a duplicate _id is a failure even if both trees have it
+    for where, dups in (("reference", ref_dups), ("new", new_dups)):
+        for k in sorted(dups):
+            lines.append(f"DUPLICATE {k} ({dups[k]} documents in {where})")
+    for k in sorted(set(ref) - set(new)):
+        lines.append(f"MISSING {k} (only in reference)")
+    for k in sorted(set(new) - set(ref)):
+        lines.append(f"EXTRA {k} (only in new)")
+
+    differing = {k for k in set(ref) & set(new) if ref[k] != new[k]}
+    if differing:
+        ref_docs = load_docs(ref_path, differing)
+        new_docs = load_docs(new_path, differing)
+        for k in sorted(differing):
+            a, b = ref_docs[k], new_docs[k]
+            lines.append(f"DIFF {k} name={b.get('name')!r} at {first_diff(a, b)}")
+    return lines
+
+
+def check_idempotent(path: Path, only_npc: bool = False) -> List[str]:
+    """
+    Run the repairs on an already repaired pack; every change they still make is reported.
+    only_npc must match the run that produced the pack (traits only checks type=='npc' then).
+    """
+    lines: List[str] = []
+    checks = [(name, get_repair(name, only_npc=only_npc)) for name in repairs_for_pack(path.name)]
+    for line_no, doc in iter_db_docs(path):
+        for name, fn in checks:
+            changed, changes = fn(doc)
+            if changed:
+                lines.append(f"NOT IDEMPOTENT ({name}) Line {line_no}: {doc_key(line_no, doc)} -> " + "; ".join(changes))
+    return lines
+
+
+def iter_pairs(ref_dir: Path, new_dir: Path, recursive: bool) -> Iterator[Tuple[Path | None, Path | None]]:
+    """(ref, new) for every .db in either tree; None on the side where the file is missing."""
+    ref_files = {p.relative_to(ref_dir): p for p in find_db_files(ref_dir, recursive)}
+    new_files = {p.relative_to(new_dir): p for p in find_db_files(new_dir, recursive)}
+    for rel in sorted(set(ref_files) | set(new_files)):
+        yield ref_files.get(rel), new_files.get(rel)
+
+
+def run(args: argparse.Namespace) -> int:
+    for folder in (args.reference, args.new):
+        if folder is not None and not folder.is_dir():
+            print(f"ERROR: folder not found: {folder}")
+            return 2
+
+    report_lines: List[str] = []
+    failures = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        if args.new is not None:
+            pairs = list(iter_pairs(args.reference, args.new, args.recursive))
+            present = [(a, b) for a, b in pairs if a is not None and b is not None]
+            for ref, new in pairs:
+                if new is None:
+                    failures += 1
+                    report_lines.append(f"{ref.relative_to(args.reference)}: MISSING FILE in {args.new}")
+                    print(f"{ref.relative_to(args.reference)} -> missing in new tree")
+                elif ref is None:
+                    failures += 1
+                    report_lines.append(f"{new.relative_to(args.new)}: EXTRA FILE (only in {args.new})")
+                    print(f"{new.relative_to(args.new)} -> only in new tree")
+
+            for (ref, _), lines in zip(present, pool.map(compare_pack, present)):
+                rel = ref.relative_to(args.reference)
+                if lines:
+                    failures += 1
+                    report_lines.extend(f"{rel}: {line}" for line in lines)
+                print(f"{rel} -> {'OK' if not lines else f'{len(lines)} difference(s)'}")
+
+        if args.idempotence:
+            base = args.new if args.new is not None else args.reference
+            files = find_db_files(base, args.recursive)
+            for path, lines in zip(files, pool.map(partial(check_idempotent, only_npc=args.only_npc), files)):
+                rel = path.relative_to(base)
+                if lines:
+                    failures += 1
+                    report_lines.extend(f"{rel}: {line}" for line in lines)
+                print(f"{rel} -> idempotent={'yes' if not lines else f'no ({len(lines)} doc(s) still change)'}")
+
+    for line in report_lines[:20]:
+        print(f"  {line}")
+    if len(report_lines) > 20:
+        print(f"  ... {len(report_lines) - 20} more")
+
+    if args.report is not None:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text("\n".join(report_lines), encoding="utf-8")
+        print(f"Report: {args.report}")
+
+    print("\nDone.")
+    print(f"Failed checks: {failures}")
+    return 1 if failures else 0
+